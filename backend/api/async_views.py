@@ -0,0 +1,49 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.middleware import instrument_queries
+
+ASYNC_READ_ROUTES = (
+    'recipes-list',
+    'recipes-detail',
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+)
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        with instrument_queries(getattr(request, 'query_timer', None)):
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    read = sync_to_async(run_view, thread_sensitive=False)
+    write = sync_to_async(run_view, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(view, request, *args, **kwargs)
+        return await write(view, request, *args, **kwargs)
+
+    for attribute in ('cls', 'initkwargs', 'actions', 'csrf_exempt'):
+        if hasattr(view, attribute):
+            setattr(async_view, attribute, getattr(view, attribute))
+    async_view.__name__ = view.__name__
+    return async_view
+
+
+def use_async_read_views(urlpatterns):
+    for pattern in urlpatterns:
+        if pattern.name in ASYNC_READ_ROUTES:
+            pattern.callback = async_read_view(pattern.callback)
+    return urlpatterns
@@ -1,6 +1,27 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Exists, F, OuterRef, Q
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Ingredient, Recipe, Tag, TagRecipe
+from recipes.search import Casefold
+
+TAGS_MODE_ANY = 'any'
+TAGS_MODE_ALL = 'all'
+TAGS_MODES = (
+    (TAGS_MODE_ANY, 'Любой из тегов'),
+    (TAGS_MODE_ALL, 'Все теги'),
+)
+RECIPE_ORDERINGS = {
+    'new': ('-pub_date', '-id'),
+    'popular': ('-favorites_count', '-pub_date', '-id'),
+    'trending': ('-trending_score', '-pub_date', '-id'),
+}
+RECIPE_ORDERING_CHOICES = (
+    ('new', 'Сначала новые'),
+    ('popular', 'Самые популярные'),
+    ('trending', 'Популярные сейчас'),
+)
 
 
 class IngredientSearchFilter(filters.FilterSet):
@@ -16,16 +37,50 @@ class RecipeFilter(filters.FilterSet):
         field_name='tags__slug',
         queryset=Tag.objects.all(),
         to_field_name='slug',
+        method='get_tags',
+    )
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES,
+        method='get_tags_mode',
     )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=RECIPE_ORDERING_CHOICES,
+        method='get_ordering',
+    )
 
     class Meta:
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',)
+        fields = (
+            'author',
+            'tags',
+            'tags_mode',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search',
+            'ordering',
+        )
         model = Recipe
 
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        if self.form.cleaned_data.get('tags_mode') == TAGS_MODE_ALL:
+            for tag in value:
+                queryset = queryset.filter(Exists(TagRecipe.objects.filter(
+                    recipe=OuterRef('pk'), tag=tag
+                )))
+            return queryset
+        return queryset.filter(Exists(TagRecipe.objects.filter(
+            recipe=OuterRef('pk'), tag__in=value
+        )))
+
+    def get_tags_mode(self, queryset, name, value):
+        return queryset
+
     def get_is_favorited(self, queryset, name, value):
         if value:
             return queryset.filter(favorites__user=self.request.user)
@@ -35,3 +90,21 @@ class RecipeFilter(filters.FilterSet):
         if value:
             return queryset.filter(shopping_carts__user=self.request.user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            value = value.casefold()
+            return queryset.alias(
+                search_name=Casefold('name'),
+                search_text=Casefold('text'),
+            ).filter(
+                Q(search_name__contains=value)
+                | Q(search_text__contains=value)
+            )
+        query = SearchQuery(value, config='russian', search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date')
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
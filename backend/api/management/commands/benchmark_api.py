@@ -0,0 +1,81 @@
+import json
+from statistics import mean
+from time import perf_counter
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from recipes.models import Recipe
+from users.models import User
+
+from ..endpoints import fetch, get_client, get_endpoint_urls
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и количество SQL-запросов основных эндпоинтов '
+        'API и сохраняет результат в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='email пользователя, от имени которого выполнять запросы',
+        )
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='benchmark.json')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(email=options['user'])
+        user = users.first()
+        urls = get_endpoint_urls(user) if user else None
+        if urls is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт!')
+        client = get_client(user)
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for url in urls:
+                for _ in range(options['warmup']):
+                    fetch(client, url)
+                timings = []
+                query_counts = []
+                for _ in range(options['iterations']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = perf_counter()
+                        response = fetch(client, url)
+                        timings.append((perf_counter() - started) * 1000)
+                    query_counts.append(len(queries))
+                results[url] = {
+                    'status': response.status_code,
+                    'p50_ms': round(percentile(timings, 50), 2),
+                    'p95_ms': round(percentile(timings, 95), 2),
+                    'mean_ms': round(mean(timings), 2),
+                    'queries': max(query_counts),
+                }
+                self.stdout.write(
+                    f'{url}: p50 {results[url]["p50_ms"]} мс, '
+                    f'p95 {results[url]["p95_ms"]} мс, '
+                    f'запросов {results[url]["queries"]}'
+                )
+        report = {
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'endpoints': results,
+        }
+        with open(options['output'], 'w', encoding='UTF-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,53 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from users.models import User
+from ..endpoints import fetch, get_client, get_endpoint_urls
+
+
+class Command(BaseCommand):
+    help = 'Выводит планы выполнения SQL-запросов основных эндпоинтов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='email пользователя, от имени которого выполнять запросы',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(email=options['user'])
+        user = users.first()
+        urls = get_endpoint_urls(user) if user else None
+        if urls is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт!')
+        prefix = connection.ops.explain_prefix
+        if options['analyze'] and connection.vendor == 'postgresql':
+            prefix += ' ANALYZE'
+        client = get_client(user)
+        for url in urls:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                with CaptureQueriesContext(connection) as queries:
+                    response = fetch(client, url)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'GET {url} -> {response.status_code}, '
+                f'запросов: {len(queries)}'
+            ))
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                self.stdout.write(self.style.SQL_KEYWORD(sql))
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{prefix} {sql}')
+                    for row in cursor.fetchall():
+                        self.stdout.write(
+                            '    ' + ' '.join(str(column) for column in row)
+                        )
@@ -0,0 +1,137 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean
+from time import perf_counter, sleep
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from ..endpoints import LOAD_TEST_ENDPOINTS, get_endpoint_urls
+from .benchmark_api import percentile
+
+ERROR_BACKOFF = 0.05
+MAX_ERROR_BACKOFF = 1.0
+
+
+def run_worker(url, headers, deadline, max_failures):
+    timings = []
+    errors = 0
+    failures = 0
+    while perf_counter() < deadline:
+        started = perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers)) as response:
+                response.read()
+        except (HTTPError, URLError):
+            errors += 1
+            failures += 1
+            if failures >= max_failures:
+                break
+            sleep(min(ERROR_BACKOFF * 2 ** (failures - 1), MAX_ERROR_BACKOFF))
+            continue
+        failures = 0
+        timings.append((perf_counter() - started) * 1000)
+    return timings, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер параллельными запросами к эндпоинтам '
+        'чтения и сохраняет пропускную способность и задержки в JSON. '
+        'Позволяет сравнить режимы SERVER_MODE=wsgi и SERVER_MODE=asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='адрес запущенного сервера',
+        )
+        parser.add_argument(
+            '--user',
+            help='email пользователя; без него запросы анонимные',
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='длительность нагрузки на каждый эндпоинт, с',
+        )
+        parser.add_argument(
+            '--max-failures',
+            type=int,
+            default=20,
+            help='остановить поток после указанного числа ошибок подряд',
+        )
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', default='load_test.json')
+
+    def handle(self, *args, **options):
+        user = None
+        headers = {'Accept': 'application/json'}
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден!')
+            token, _ = Token.objects.get_or_create(user=user)
+            headers['Authorization'] = f'Token {token.key}'
+        urls = get_endpoint_urls(user, LOAD_TEST_ENDPOINTS)
+        if urls is None:
+            raise CommandError('Нужен хотя бы один рецепт!')
+        concurrency = options['concurrency']
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for url in urls:
+                deadline = perf_counter() + options['duration']
+                started = perf_counter()
+                workers = [
+                    executor.submit(
+                        run_worker,
+                        options['base_url'] + quote(url, safe='/?=&'),
+                        headers,
+                        deadline,
+                        options['max_failures'],
+                    )
+                    for _ in range(concurrency)
+                ]
+                timings = []
+                errors = 0
+                for worker in workers:
+                    worker_timings, worker_errors = worker.result()
+                    timings.extend(worker_timings)
+                    errors += worker_errors
+                elapsed = perf_counter() - started
+                if not timings:
+                    raise CommandError(f'{url}: нет успешных ответов!')
+                results[url] = {
+                    'requests': len(timings),
+                    'errors': errors,
+                    'rps': round(len(timings) / elapsed, 1),
+                    'p50_ms': round(percentile(timings, 50), 2),
+                    'p95_ms': round(percentile(timings, 95), 2),
+                    'mean_ms': round(mean(timings), 2),
+                }
+                self.stdout.write(
+                    f'{url}: {results[url]["rps"]} запросов/с, '
+                    f'p50 {results[url]["p50_ms"]} мс, '
+                    f'p95 {results[url]["p95_ms"]} мс, '
+                    f'ошибок {errors}'
+                )
+        report = {
+            'label': options['label'],
+            'base_url': options['base_url'],
+            'concurrency': concurrency,
+            'duration': options['duration'],
+            'authenticated': user is not None,
+            'endpoints': results,
+        }
+        with open(options['output'], 'w', encoding='UTF-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
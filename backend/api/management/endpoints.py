@@ -0,0 +1,64 @@
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+
+ENDPOINTS = (
+    '/api/recipes/',
+    '/api/recipes/?cursor=',
+    '/api/recipes/?author={user_id}',
+    '/api/recipes/?tags={tag}',
+    '/api/recipes/?tags={tag}&tags={other_tag}',
+    '/api/recipes/?tags={tag}&tags={other_tag}&tags_mode=all',
+    '/api/recipes/?is_favorited=1',
+    '/api/recipes/?is_in_shopping_cart=1',
+    '/api/recipes/?search={recipe_word}',
+    '/api/recipes/{recipe_id}/',
+    '/api/recipes/download_shopping_cart/',
+    '/api/users/',
+    '/api/users/subscriptions/?recipes_limit=3',
+    '/api/ingredients/',
+    '/api/ingredients/?name={ingredient_prefix}',
+    '/api/ingredients/{ingredient_id}/',
+    '/api/tags/',
+)
+LOAD_TEST_ENDPOINTS = (
+    '/api/recipes/',
+    '/api/recipes/?tags={tag}',
+    '/api/recipes/{recipe_id}/',
+    '/api/ingredients/',
+    '/api/ingredients/?name={ingredient_prefix}',
+    '/api/tags/',
+)
+
+
+def get_endpoint_urls(user, endpoints=ENDPOINTS):
+    recipe = Recipe.objects.prefetch_related('tags').first()
+    if recipe is None:
+        return None
+    tags = list(recipe.tags.all()[:2])
+    tag = tags[0] if tags else None
+    other_tag = tags[-1] if tags else None
+    ingredient = Ingredient.objects.first()
+    params = {
+        'user_id': user.id if user else '',
+        'tag': tag.slug if tag else '',
+        'other_tag': other_tag.slug if other_tag else '',
+        'recipe_word': recipe.name.split()[0],
+        'recipe_id': recipe.id,
+        'ingredient_id': ingredient.id if ingredient else 0,
+        'ingredient_prefix': ingredient.name[:2] if ingredient else '',
+    }
+    return [endpoint.format(**params) for endpoint in endpoints]
+
+
+def get_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def fetch(client, url):
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
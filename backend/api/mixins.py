@@ -0,0 +1,106 @@
+from hashlib import sha1
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+
+from foodgram.middleware import timing_mark
+from foodgram.routers import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    primary_reads,
+    replica_reads,
+)
+from recipes.cache import CATALOG_VERSION_KEY, get_version
+
+
+class CatalogCacheMixin:
+    catalog_payloads = {}
+
+    def get_catalog_payload(self):
+        version = get_version(CATALOG_VERSION_KEY)
+        cached = self.catalog_payloads.get(self.basename)
+        if cached is None or cached[0] != version:
+            with primary_reads():
+                serializer = self.get_serializer(
+                    self.get_queryset(), many=True
+                )
+                content = JSONRenderer().render(serializer.data)
+            cached = (version, content, f'"{sha1(content).hexdigest()}"')
+            self.catalog_payloads[self.basename] = cached
+        return cached[1], cached[2]
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        content, etag = self.get_catalog_payload()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE
+        )
+        return response
+
+
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.DATABASE_REPLICAS:
+            return
+        user = request.user
+        replica_reads.set(
+            request.method in SAFE_METHODS
+            and not (
+                user.is_authenticated and is_pinned_to_primary(user.id)
+            )
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.id)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SerializerTimingMixin:
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = self.request._request
+        if (
+            self.request.method in SAFE_METHODS
+            and not hasattr(request, 'serializer_started')
+        ):
+            request.serializer_started = timing_mark(request)
+        return serializer
+
+    def finish_serializer_timing(self):
+        request = self.request._request
+        if (
+            hasattr(request, 'serializer_started')
+            and not hasattr(request, 'serializer_finished')
+        ):
+            request.serializer_finished = timing_mark(request)
+
+    def get_paginated_response(self, data):
+        self.finish_serializer_timing()
+        return super().get_paginated_response(data)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.finish_serializer_timing()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+from .filters import RECIPE_ORDERINGS
+
+
+class RecipeCursorPagination(CursorPagination):
+    ordering = RECIPE_ORDERINGS['new']
+
+    def get_ordering(self, request, queryset, view):
+        return RECIPE_ORDERINGS.get(
+            request.query_params.get('ordering'), self.ordering
+        )
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
 
@@ -15,3 +17,12 @@ class IsAuthorOrAdminOrReadOnly(permissions.BasePermission):
             or obj.author == request.user
             or request.user.is_admin
         )
+
+
+class HasMetricsToken(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
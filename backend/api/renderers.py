@@ -0,0 +1,122 @@
+import csv
+import json
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+
+PDF_FONT_NAME = 'ShoppingCartFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(renderers.BaseRenderer):
+    charset = 'utf-8'
+    header = ''
+    footer = ''
+    separator = ''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return str(data.get('detail', data)).encode(
+                self.charset or 'utf-8'
+            )
+        return b''.join(self.stream(data))
+
+    def prepare(self):
+        pass
+
+    def format_row(self, name, amount, measurement_unit):
+        return f'{name} - {amount} {measurement_unit}\n'
+
+    def rows(self, ingredients):
+        for ingredient in ingredients:
+            yield self.format_row(
+                ingredient.get('ingredient__name'),
+                ingredient.get('amount'),
+                ingredient.get('ingredient__measurement_unit'),
+            )
+
+    def stream(self, ingredients):
+        if self.header:
+            yield self.header.encode(self.charset)
+        for index, row in enumerate(self.rows(ingredients)):
+            yield ((self.separator if index else '') + row).encode(
+                self.charset
+            )
+        if self.footer:
+            yield self.footer.encode(self.charset)
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    header = 'name,amount,measurement_unit\r\n'
+
+    def format_row(self, name, amount, measurement_unit):
+        return csv.writer(Echo()).writerow((name, amount, measurement_unit))
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    header = '['
+    footer = ']'
+    separator = ','
+
+    def format_row(self, name, amount, measurement_unit):
+        return json.dumps({
+            'name': name,
+            'amount': amount,
+            'measurement_unit': measurement_unit,
+        }, ensure_ascii=False)
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def prepare(self):
+        if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(PDF_FONT_NAME, settings.SHOPPING_CART_PDF_FONT)
+            )
+
+    def stream(self, ingredients):
+        self.prepare()
+        buffer = BytesIO()
+        font = PDF_FONT_NAME
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        pdf.setTitle('Список покупок')
+        _, height = A4
+        leading = PDF_FONT_SIZE * 1.5
+        top = height - PDF_MARGIN
+        pdf.setFont(font, PDF_FONT_SIZE + 4)
+        pdf.drawString(PDF_MARGIN, top, 'Список покупок')
+        position = top - leading * 2
+        pdf.setFont(font, PDF_FONT_SIZE)
+        for row in self.rows(ingredients):
+            if position < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, PDF_FONT_SIZE)
+                position = top
+            pdf.drawString(PDF_MARGIN, position, row.rstrip('\n'))
+            position -= leading
+        pdf.save()
+        yield buffer.getvalue()
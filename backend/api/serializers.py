@@ -1,11 +1,15 @@
-import base64
-
-from django.core.files.base import ContentFile
-from django.db import IntegrityError
-from django.shortcuts import get_object_or_404
+import binascii
+from functools import partial
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Manager, prefetch_related_objects
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers, validators
 
+from foodgram.routers import replica_reads
 from users.models import User, Subscribe
 from recipes.models import (
     Tag,
@@ -20,9 +24,53 @@ from recipes.models import (
     MIN_ING_AMOUNT,
     MAX_ING_AMOUNT,
 )
+from recipes.counters import change_counter
+from recipes.images import get_image_storage, rendition_pool
+from recipes.cache import (
+    bump_recipe_shopping_carts,
+    get_recipe_fragments,
+    recipe_fragment_keys,
+    set_recipe_fragments,
+)
+
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMATS = ('jpeg', 'jpg', 'png', 'gif', 'webp')
+RECIPE_FRAGMENT_RELATIONS = (
+    'author',
+    'recipe_ingredients__ingredient',
+    'tags',
+)
+
+
+def load_fragment_recipes(recipes):
+    if replica_reads.get():
+        primary = list(Recipe.objects.using(DEFAULT_DB_ALIAS).filter(
+            id__in=[recipe.id for recipe in recipes]
+        ).prefetch_related(*RECIPE_FRAGMENT_RELATIONS))
+        if len(primary) == len(recipes):
+            return primary
+    prefetch_related_objects(recipes, *RECIPE_FRAGMENT_RELATIONS)
+    return recipes
+
 
+class SubscribedMixin:
 
-class CustomUserSerializer(UserSerializer):
+    def get_subscribed_ids(self):
+        if 'subscribed_ids' not in self.context:
+            request = self.context.get('request')
+            subscribed_ids = set()
+            if request and request.user.is_authenticated:
+                subscribed_ids = set(Subscribe.objects.filter(
+                    user=request.user
+                ).values_list('author_id', flat=True))
+            self.context['subscribed_ids'] = subscribed_ids
+        return self.context['subscribed_ids']
+
+    def get_is_subscribed(self, obj):
+        return obj.id in self.get_subscribed_ids()
+
+
+class CustomUserSerializer(SubscribedMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -36,25 +84,70 @@ class CustomUserSerializer(UserSerializer):
         )
         model = User
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Subscribe.objects.filter(
-                user=request.user,
-                author=obj
-            ).exists()
-        return False
-
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'invalid_format': 'Поддерживаются только изображения {formats}!',
+        'invalid_base64': 'Не удалось декодировать изображение!',
+        'too_large': 'Размер изображения не должен превышать {max_size} МБ!',
+    }
+
+    def decode(self, data):
+        header, _, encoded = data.partition(';base64,')
+        content_type = header[len('data:'):]
+        ext = content_type.split('/')[-1].lower()
+        if ext not in IMAGE_FORMATS:
+            self.fail('invalid_format', formats=', '.join(IMAGE_FORMATS))
+        size = len(encoded) * 3 // 4
+        if size > settings.MAX_IMAGE_UPLOAD_SIZE:
+            self.fail(
+                'too_large',
+                max_size=f'{settings.MAX_IMAGE_UPLOAD_SIZE / 1024 ** 2:g}'
+            )
+        file = File(
+            SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            ),
+            name='temp.' + ext,
+        )
+        try:
+            for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+                file.write(binascii.a2b_base64(
+                    encoded[start:start + BASE64_CHUNK_SIZE]
+                ))
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_base64')
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(data)
         return super().to_internal_value(data)
 
 
+class ImageRenditionsMixin:
+
+    def absolute_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request and url else url
+
+    def get_rendition_urls(self, obj):
+        storage = get_image_storage()
+        return {
+            rendition: storage.url(name)
+            for rendition, name in obj.image_renditions.items()
+        }
+
+    def get_image_renditions(self, obj):
+        return {
+            rendition: self.absolute_url(url)
+            for rendition, url in self.get_rendition_urls(obj).items()
+        }
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'name', 'color', 'slug',)
@@ -96,13 +189,36 @@ class IngredientRecipeCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        keys = recipe_fragment_keys([recipe.id for recipe in recipes])
+        fragments = get_recipe_fragments(keys)
+        missing = [
+            recipe for recipe in recipes if recipe.id not in fragments
+        ]
+        if missing:
+            missing = {
+                recipe.id: self.child.serialize_fragment(recipe)
+                for recipe in load_fragment_recipes(missing)
+            }
+            set_recipe_fragments(keys, missing)
+            fragments.update(missing)
+        return [
+            self.child.add_user_fields(fragments[recipe.id], recipe)
+            for recipe in recipes
+        ]
+
+
+class RecipeSerializer(ImageRenditionsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(
         many=True, source='recipe_ingredients'
     )
     image = Base64ImageField()
+    image_renditions = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -116,23 +232,59 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_renditions',
             'text',
             'cooking_time',
         )
         read_only_fields = ('is_favorited', 'is_in_shopping_cart',)
         model = Recipe
+        list_serializer_class = RecipeListSerializer
+
+    def serialize_fragment(self, instance):
+        data = super().to_representation(instance)
+        data.pop('is_favorited')
+        data.pop('is_in_shopping_cart')
+        data['author'].pop('is_subscribed')
+        data['image'] = instance.image.url if instance.image else None
+        data['image_renditions'] = self.get_rendition_urls(instance)
+        return data
+
+    def add_user_fields(self, data, instance):
+        data['image'] = self.absolute_url(data['image'])
+        data['image_renditions'] = {
+            rendition: self.absolute_url(url)
+            for rendition, url in data['image_renditions'].items()
+        }
+        data['is_favorited'] = self.get_is_favorited(instance)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(instance)
+        data['author']['is_subscribed'] = instance.author_id in (
+            self.fields['author'].get_subscribed_ids()
+        )
+        return data
+
+    def to_representation(self, instance):
+        keys = recipe_fragment_keys((instance.id,))
+        data = get_recipe_fragments(keys).get(instance.id)
+        if data is None:
+            data = self.serialize_fragment(
+                load_fragment_recipes((instance,))[0]
+            )
+            set_recipe_fragments(keys, {instance.id: data})
+        return self.add_user_fields(data, instance)
 
-    def check_recipe(self, model, obj):
+    def check_recipe(self, model, obj, annotation):
+        if hasattr(obj, annotation):
+            return getattr(obj, annotation)
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return model.objects.filter(user=user, recipe=obj).exists()
 
     def get_is_favorited(self, obj):
-        return self.check_recipe(Favorite, obj)
+        return self.check_recipe(Favorite, obj, 'is_favorited')
 
     def get_is_in_shopping_cart(self, obj):
-        return self.check_recipe(ShoppingCart, obj)
+        return self.check_recipe(ShoppingCart, obj, 'is_in_shopping_cart')
 
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
@@ -179,53 +331,110 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Нужно выбрать хотя бы 1 ингредиент!'
             )
-        unique_ings = []
-        for ingredient in ingredients:
-            ing = get_object_or_404(Ingredient, id=ingredient.get('id'))
-            if ing in unique_ings:
-                raise serializers.ValidationError(
-                    'Не стоит добавлять один и тот же ингредиент много раз!'
-                )
-            unique_ings.append(ing)
+        ingredient_ids = [ingredient.get('id') for ingredient in ingredients]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                'Не стоит добавлять один и тот же ингредиент много раз!'
+            )
+        existing_ids = set(Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).values_list('id', flat=True))
+        if len(existing_ids) != len(ingredient_ids):
+            raise serializers.ValidationError({'ingredients': [
+                {} if ingredient_id in existing_ids
+                else {'id': ['Такого ингредиента не существует!']}
+                for ingredient_id in ingredient_ids
+            ]})
         return attrs
 
     def validate_tags(self, tags):
-        unique_tags = []
         if not tags:
             raise serializers.ValidationError(
                 'Нужно выбрать хотя бы 1 тег!'
             )
-        for tag in tags:
-            if tag in unique_tags:
-                raise serializers.ValidationError(
-                    'Не стоит добавлять один и тот же ингредиент много раз!'
-                )
-            unique_tags.append(tag)
+        if len({tag.id for tag in tags}) != len(tags):
+            raise serializers.ValidationError(
+                'Не стоит добавлять один и тот же тег много раз!'
+            )
         return tags
 
     def create_tags_recipe(self, tags, recipe):
-        for tag in tags:
-            TagRecipe.objects.create(
-                tag_id=tag.id,
-                recipe=recipe
-            )
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag_id=tag.id, recipe=recipe) for tag in tags
+        )
 
     def create_ingredients_recipe(self, ingredients, recipe):
-        for ingredient in ingredients:
-            IngredientRecipe.objects.create(
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
                 ingredient_id=ingredient.get('id'),
                 amount=ingredient.get('amount'),
                 recipe=recipe
-            )
+            ) for ingredient in ingredients
+        )
+
+    def update_tags_recipe(self, tags, recipe):
+        tag_ids = {tag.id for tag in tags}
+        current_ids = set(TagRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('tag_id', flat=True))
+        if current_ids - tag_ids:
+            TagRecipe.objects.filter(
+                recipe=recipe,
+                tag_id__in=current_ids - tag_ids
+            ).delete()
+        self.create_tags_recipe(
+            [tag for tag in tags if tag.id not in current_ids],
+            recipe
+        )
+
+    def update_ingredients_recipe(self, ingredients, recipe):
+        amounts = {
+            ingredient.get('id'): ingredient.get('amount')
+            for ingredient in ingredients
+        }
+        current = {
+            ing_recipe.ingredient_id: ing_recipe
+            for ing_recipe in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        removed_ids = current.keys() - amounts.keys()
+        if removed_ids:
+            IngredientRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed_ids
+            ).delete()
+        changed = []
+        for ingredient_id, ing_recipe in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and ing_recipe.amount != amount:
+                ing_recipe.amount = amount
+                changed.append(ing_recipe)
+        IngredientRecipe.objects.bulk_update(changed, ('amount',))
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient.get('id') not in current
+        ]
+        self.create_ingredients_recipe(added, recipe)
+        if removed_ids or changed or added:
+            bump_recipe_shopping_carts((recipe.id,))
+
+    def schedule_renditions(self, recipe):
+        transaction.on_commit(partial(
+            rendition_pool.submit, recipe.id, recipe.image.name
+        ))
 
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         author = self.context.get('request').user
         try:
-            recipe = Recipe.objects.create(**validated_data, author=author)
-            self.create_ingredients_recipe(ingredients, recipe)
-            self.create_tags_recipe(tags, recipe)
+            with transaction.atomic():
+                recipe = Recipe.objects.create(
+                    **validated_data, author=author
+                )
+                change_counter(User, author.id, 'recipes_count', 1)
+                self.create_ingredients_recipe(ingredients, recipe)
+                self.create_tags_recipe(tags, recipe)
+                self.schedule_renditions(recipe)
             return recipe
         except IntegrityError:
             raise serializers.ValidationError(
@@ -233,19 +442,25 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             )
 
     def update(self, instance, validated_data):
-        instance.tags.clear()
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        self.create_ingredients_recipe(ingredients, instance)
-        self.create_tags_recipe(tags, instance)
-        super().update(instance, validated_data)
+        image = instance.image.name
+        with transaction.atomic():
+            self.update_ingredients_recipe(ingredients, instance)
+            self.update_tags_recipe(tags, instance)
+            super().update(instance, validated_data)
+            if instance.image.name != image:
+                instance.image_renditions = {}
+                instance.save(update_fields=('image_renditions',))
+                self.schedule_renditions(instance)
         return instance
 
 
-class RecipeCutSerializer(serializers.ModelSerializer):
+class RecipeCutSerializer(ImageRenditionsMixin, serializers.ModelSerializer):
+    image_renditions = serializers.SerializerMethodField()
+
     class Meta:
-        fields = ('id', 'name', 'image', 'cooking_time',)
+        fields = ('id', 'name', 'image', 'image_renditions', 'cooking_time',)
         model = Recipe
 
 
@@ -262,10 +477,9 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         model = User
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(SubscribedMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
@@ -285,16 +499,6 @@ class SubscribeSerializer(serializers.ModelSerializer):
             'recipes_limit'
         )
         recipes = obj.recipes.all()
-        if recipes_limit:
+        if recipes_limit and recipes_limit.isdigit():
             recipes = recipes[:int(recipes_limit)]
-            return RecipeCutSerializer(recipes, many=True).data
-
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return Subscribe.objects.filter(
-            user=request.user.is_authenticated,
-            author=obj
-        ).exists()
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return RecipeCutSerializer(recipes, many=True).data
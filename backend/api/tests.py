@@ -0,0 +1,473 @@
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from time import time
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.images import get_image_storage
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TagRecipe,
+)
+from users.models import Subscribe, User
+
+PAGE_SIZE = 6
+
+
+def image_data(image_format='PNG', content_type='image/png'):
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), (200, 100, 50)).save(buffer, format=image_format)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:{content_type};base64,{encoded}'
+
+
+class FoodgramTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='password',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.anonymous = APIClient()
+        self.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}',
+                color=f'#00000{number}',
+                slug=f'tag-{number}',
+            )
+            for number in range(2)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        self.author = self.create_author(0)
+
+    def create_author(self, number):
+        return User.objects.create_user(
+            username=f'author_{number}',
+            email=f'author_{number}@example.com',
+            password='password',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+
+    def create_recipe(self, author=None, tags=(), **kwargs):
+        recipe = Recipe.objects.create(**{
+            'author': author or self.author,
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'image': 'recipes/images/test.png',
+            'cooking_time': 10,
+            **kwargs,
+        })
+        for tag in tags:
+            TagRecipe.objects.create(recipe=recipe, tag=tag)
+        for ingredient in self.ingredients:
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=5
+            )
+        return recipe
+
+
+class QueryCountTests(FoodgramTestCase):
+
+    def create_recipes(self, count, authors=None):
+        authors = authors or [self.author]
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}',
+                text=f'Описание {number}',
+                image='recipes/images/test.png',
+                cooking_time=10,
+            )
+            for tag in self.tags:
+                TagRecipe.objects.create(recipe=recipe, tag=tag)
+            for ingredient in self.ingredients:
+                IngredientRecipe.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=5
+                )
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+            recipes.append(recipe)
+        return recipes
+
+    def subscribe(self, count):
+        authors = [
+            self.create_author(number) for number in range(1, count + 1)
+        ]
+        for author in authors:
+            Subscribe.objects.create(user=self.user, author=author)
+        self.create_recipes(count * 2, authors)
+
+    def assert_queries(self, client, url, expected):
+        with self.assertNumQueries(expected):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipes_list_anonymous(self):
+        for count in (1, PAGE_SIZE):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                cache.clear()
+                self.create_recipes(count)
+                response = self.assert_queries(
+                    self.anonymous, '/api/recipes/', 6
+                )
+                self.assertEqual(len(response.data['results']), count)
+
+    def test_recipes_list_authenticated(self):
+        for count in (1, PAGE_SIZE):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                cache.clear()
+                self.create_recipes(count)
+                response = self.assert_queries(
+                    self.client, '/api/recipes/', 7
+                )
+                self.assertEqual(len(response.data['results']), count)
+                self.assertTrue(all(
+                    recipe['is_favorited'] and recipe['is_in_shopping_cart']
+                    for recipe in response.data['results']
+                ))
+
+    def test_recipe_detail(self):
+        recipe = self.create_recipes(1)[0]
+        self.assert_queries(self.client, f'/api/recipes/{recipe.id}/', 6)
+
+    def test_subscriptions(self):
+        for count in (1, PAGE_SIZE):
+            with self.subTest(authors=count):
+                Subscribe.objects.all().delete()
+                User.objects.exclude(
+                    id__in=(self.user.id, self.author.id)
+                ).delete()
+                cache.clear()
+                self.subscribe(count)
+                response = self.assert_queries(
+                    self.client,
+                    '/api/users/subscriptions/?recipes_limit=1',
+                    4,
+                )
+                self.assertEqual(len(response.data['results']), count)
+
+
+class RecipeValidationTests(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def recipe_data(self, **kwargs):
+        return {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients
+            ],
+            'tags': [tag.id for tag in self.tags],
+            'image': image_data(),
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+            **kwargs,
+        }
+
+    def test_missing_ingredients_are_reported_per_item(self):
+        response = self.client.post('/api/recipes/', self.recipe_data(
+            ingredients=[
+                {'id': self.ingredients[0].id, 'amount': 10},
+                {'id': 0, 'amount': 10},
+            ]
+        ), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['ingredients'], [
+            {},
+            {'id': ['Такого ингредиента не существует!']},
+        ])
+
+    def test_duplicate_tags_are_rejected(self):
+        response = self.client.post('/api/recipes/', self.recipe_data(
+            tags=[self.tags[0].id, self.tags[0].id]
+        ), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['tags'],
+            ['Не стоит добавлять один и тот же тег много раз!'],
+        )
+
+    def test_image_is_decoded_and_counted(self):
+        response = self.client.post(
+            '/api/recipes/', self.recipe_data(), format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(name='Новый рецепт')
+        self.assertTrue(get_image_storage().exists(recipe.image.name))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+
+    def test_unsupported_image_format_is_rejected(self):
+        response = self.client.post('/api/recipes/', self.recipe_data(
+            image=image_data('BMP', 'image/bmp')
+        ), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+        self.assertFalse(os.listdir(self.media_root))
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=16)
+    def test_too_large_image_is_rejected(self):
+        response = self.client.post(
+            '/api/recipes/', self.recipe_data(), format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+
+
+class RecipeFeedTests(FoodgramTestCase):
+
+    def test_tags_any_and_all(self):
+        first, second = self.tags
+        self.create_recipe(tags=(first,))
+        self.create_recipe(tags=(second,))
+        both = self.create_recipe(tags=(first, second))
+        url = f'/api/recipes/?tags={first.slug}&tags={second.slug}'
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 3)
+        response = self.client.get(url + '&tags_mode=all')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [both.id],
+        )
+
+    def test_cursor_pages_follow_ordering_without_gaps(self):
+        recipes = [self.create_recipe() for _ in range(PAGE_SIZE * 2 + 1)]
+        for recipe in recipes[:3]:
+            Recipe.objects.filter(id=recipe.id).update(favorites_count=5)
+        expected = [
+            recipe.id for recipe in Recipe.objects.order_by(
+                '-favorites_count', '-pub_date', '-id'
+            )
+        ]
+        ids = []
+        url = '/api/recipes/?cursor=&ordering=popular'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+        self.assertEqual(set(ids[:3]), {recipe.id for recipe in recipes[:3]})
+
+    def test_anonymous_cache_is_invalidated_on_commit(self):
+        recipe = self.create_recipe()
+        anonymous = APIClient()
+        self.assertEqual(
+            anonymous.get('/api/recipes/').data['results'][0]['name'],
+            'Рецепт',
+        )
+        anonymous.get(f'/api/recipes/{recipe.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Новое название'
+            recipe.save()
+        self.assertEqual(
+            anonymous.get('/api/recipes/').data['results'][0]['name'],
+            'Новое название',
+        )
+        self.assertEqual(
+            anonymous.get(f'/api/recipes/{recipe.id}/').data['name'],
+            'Новое название',
+        )
+
+    def test_anonymous_popular_ordering_follows_favorites(self):
+        first, second = self.create_recipe(), self.create_recipe()
+        anonymous = APIClient()
+        url = '/api/recipes/?ordering=popular'
+        self.assertEqual(
+            anonymous.get(url).data['results'][0]['id'], second.id
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/recipes/{first.id}/favorite/')
+        self.assertEqual(anonymous.get(url).data['results'][0]['id'], first.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/recipes/{first.id}/favorite/')
+        self.assertEqual(
+            anonymous.get(url).data['results'][0]['id'], second.id
+        )
+
+    def test_invalid_recipes_limit_is_ignored(self):
+        Subscribe.objects.create(user=self.user, author=self.author)
+        self.create_recipe()
+        for value in ('abc', '-1'):
+            with self.subTest(recipes_limit=value):
+                response = self.client.get(
+                    f'/api/users/subscriptions/?recipes_limit={value}'
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+class RecipeSearchTests(FoodgramTestCase):
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_search_ignores_cyrillic_case(self):
+        recipe = self.create_recipe(name='Борщ')
+        self.create_recipe(name='Солянка')
+        self.assertEqual(self.search('БОРЩ'), [recipe.id])
+        self.assertEqual(self.search('борщ'), [recipe.id])
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_name_matches_rank_above_text_matches(self):
+        in_text = self.create_recipe(name='Суп', text='Почти борщ')
+        in_name = self.create_recipe(name='Борщ', text='Описание')
+        self.create_recipe(name='Солянка')
+        self.assertEqual(self.search('борщи'), [in_name.id, in_text.id])
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_trigger_updates_search_vector(self):
+        recipe = self.create_recipe(name='Солянка')
+        self.assertEqual(self.search('борщ'), [])
+        recipe.name = 'Борщ'
+        recipe.save()
+        self.assertEqual(self.search('борщ'), [recipe.id])
+        Recipe.objects.filter(id=recipe.id).update(text='С пампушками')
+        self.assertEqual(self.search('пампушки'), [recipe.id])
+
+
+class ConditionalResponseTests(FoodgramTestCase):
+
+    def test_shopping_cart_etag(self):
+        url = '/api/recipes/download_shopping_cart/?format=txt'
+        ShoppingCart.objects.create(
+            user=self.user, recipe=self.create_recipe()
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), 3)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            ShoppingCart.objects.create(
+                user=self.user, recipe=self.create_recipe()
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_catalog_etag(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Новый', color='#FFFFFF', slug='new')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+
+class CounterTests(FoodgramTestCase):
+
+    def test_favorite_counter(self):
+        recipe = self.create_recipe()
+        url = f'/api/recipes/{recipe.id}/favorite/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 0)
+
+    def test_drifted_counter_does_not_go_negative(self):
+        recipe = self.create_recipe()
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        Recipe.objects.filter(id=recipe.id).update(favorites_count=0)
+        response = self.client.delete(f'/api/recipes/{recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 204)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 0)
+
+    def test_subscribers_counter(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+
+class GcMediaTests(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.storage = get_image_storage()
+
+    def save_old(self, name, content):
+        name = self.storage.save(name, ContentFile(content))
+        old = time() - 3 * 24 * 60 * 60
+        os.utime(self.storage.path(name), (old, old))
+        return name
+
+    def gc_media(self):
+        call_command('gc_media', stdout=StringIO())
+
+    def test_orphans_are_removed_and_references_kept(self):
+        orphan = self.save_old('recipes/images/orphan.png', b'orphan')
+        used = self.save_old('recipes/images/used.png', b'used')
+        self.create_recipe(image=used)
+        self.gc_media()
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(used))
+
+    def test_deduplicated_upload_is_kept(self):
+        name = self.save_old('recipes/images/first.png', b'same')
+        again = self.storage.save(
+            'recipes/images/again.png', ContentFile(b'same')
+        )
+        self.assertEqual(again, name)
+        self.gc_media()
+        self.assertTrue(self.storage.exists(name))
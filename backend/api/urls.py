@@ -1,6 +1,8 @@
 from rest_framework import routers
+from django.conf import settings
 from django.urls import include, path
 
+from .async_views import use_async_read_views
 from .views import (
     CustomUserViewSet,
     TagViewSet,
@@ -18,8 +20,12 @@ router_v1.register('recipes', RecipeViewSet, basename='recipes')
 router_v1.register('ingredients', IngredientViewSet, basename='ingredients')
 
 
+router_urls = router_v1.urls
+if settings.SERVER_MODE == 'asgi':
+    router_urls = use_async_read_views(router_urls)
+
 urlpatterns = [
-    path('', include(router_v1.urls)),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,14 +1,24 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
 from rest_framework import status, viewsets, permissions, exceptions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db.models import (
+    Exists, OuterRef, Prefetch, Subquery, Sum, Value
+)
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 
 from users.models import User, Subscribe
+from foodgram.routers import primary_reads
 from recipes.models import (
     Tag,
     Ingredient,
@@ -17,6 +27,31 @@ from recipes.models import (
     ShoppingCart,
     IngredientRecipe,
 )
+from recipes.cache import (
+    anonymous_recipes_key,
+    cache_shopping_cart,
+    get_anonymous_response,
+    get_shopping_cart_version,
+    set_anonymous_response,
+    shopping_cart_key,
+)
+from recipes.counters import change_counter
+from recipes.search import ingredient_index
+
+from .filters import IngredientSearchFilter, RecipeFilter
+from .mixins import (
+    CatalogCacheMixin,
+    ReplicaReadMixin,
+    SerializerTimingMixin,
+)
+from .pagination import RecipeCursorPagination
+from .permissions import IsAuthorOrAdminOrReadOnly
+from .renderers import (
+    ShoppingCartCSVRenderer,
+    ShoppingCartJSONRenderer,
+    ShoppingCartPDFRenderer,
+    ShoppingCartTextRenderer,
+)
 from .serializers import (
     TagSerializer,
     IngredientSerializer,
@@ -26,25 +61,44 @@ from .serializers import (
     CustomUserSerializer,
     SubscribeSerializer
 )
-from .filters import IngredientSearchFilter, RecipeFilter
-from .permissions import IsAuthorOrAdminOrReadOnly
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    SerializerTimingMixin,
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    SerializerTimingMixin,
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientSearchFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get('limit')
+        if limit and limit.isdigit():
+            return Response(ingredient_index.search(name, int(limit)))
+        return Response(ingredient_index.search(name))
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    SerializerTimingMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (
@@ -55,34 +109,93 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipeFilter
 
     def get_queryset(self):
-        return Recipe.objects.prefetch_related(
-            'recipe_ingredients__ingredient',
-            'tags',
-            'author'
-        ).all()
+        queryset = Recipe.objects.all()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    @property
+    def paginator(self):
+        if 'cursor' in self.request.query_params:
+            self.pagination_class = RecipeCursorPagination
+        return super().paginator
+
+    def get_anonymous_cache_key(self, recipe_id=None):
+        query = urlencode(sorted(self.request.query_params.lists()), True)
+        return anonymous_recipes_key(
+            md5(query.encode()).hexdigest(), recipe_id
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = self.get_anonymous_cache_key()
+        data = get_anonymous_response(key)
+        if data is None:
+            with primary_reads():
+                response = super().list(request, *args, **kwargs)
+            set_anonymous_response(key, response.data)
+            return response
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        key = self.get_anonymous_cache_key(self.kwargs.get('pk'))
+        data = get_anonymous_response(key)
+        if data is None:
+            with primary_reads():
+                response = super().retrieve(request, *args, **kwargs)
+            set_anonymous_response(key, response.data)
+            return response
+        return Response(data)
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeSerializer
         return RecipeCreateUpdateSerializer
 
-    def add_remove_recipe(self, request, id, model):
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            change_counter(User, instance.author_id, 'recipes_count', -1)
+
+    def add_remove_recipe(self, request, id, model, counter):
         recipe = get_object_or_404(Recipe, id=id)
-        obj, created = model.objects.select_related(
-            'user', 'recipe'
-        ).get_or_create(user=request.user, recipe=recipe)
-        if request.method == 'POST' and created:
-            serializer = RecipeCutSerializer(
-                recipe,
-                context={'request': request}
-            )
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        if request.method == 'DELETE' and obj:
-            obj.delete()
+        if request.method == 'DELETE':
+            with transaction.atomic():
+                deleted, _ = model.objects.filter(
+                    user=request.user, recipe=recipe
+                ).delete()
+                if deleted:
+                    change_counter(Recipe, recipe.id, counter, -1)
             return Response(status=status.HTTP_204_NO_CONTENT)
-        raise exceptions.ValidationError(
-            detail='Вы уже совершили это действие!'
+        with transaction.atomic():
+            _, created = model.objects.get_or_create(
+                user=request.user, recipe=recipe
+            )
+            if created:
+                change_counter(Recipe, recipe.id, counter, 1)
+        if not created:
+            raise exceptions.ValidationError(
+                detail='Вы уже совершили это действие!'
+            )
+        serializer = RecipeCutSerializer(
+            recipe,
+            context={'request': request}
         )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(
         detail=True,
@@ -95,7 +208,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.add_remove_recipe(
             request,
             self.kwargs.get('pk'),
-            Favorite
+            Favorite,
+            'favorites_count'
         )
 
     @action(
@@ -109,7 +223,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.add_remove_recipe(
             request,
             self.kwargs.get('pk'),
-            ShoppingCart
+            ShoppingCart,
+            'in_carts_count'
         )
 
     @action(
@@ -118,25 +233,58 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='download_shopping_cart',
         url_name='download_shopping_cart',
         permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(
+            ShoppingCartTextRenderer,
+            ShoppingCartCSVRenderer,
+            ShoppingCartJSONRenderer,
+            ShoppingCartPDFRenderer,
+        ),
     )
     def download_shopping_cart(self, request):
-        ingredients = (IngredientRecipe.objects.filter(
-            recipe__shopping_carts__user=request.user).values(
-            'ingredient__name',
-            'ingredient__measurement_unit',
-        ).annotate(amount=Sum('amount')))
-        pretty_ings = []
-        for ingredient in ingredients:
-            pretty_ings.append('{name} - {amount} {m_unit}\n'.format(
-                name=ingredient.get('ingredient__name'),
-                amount=ingredient.get('amount'),
-                m_unit=ingredient.get('ingredient__measurement_unit')
-            ))
-        response = FileResponse(pretty_ings, content_type='text/plain')
+        renderer = request.accepted_renderer
+        version = get_shopping_cart_version(request.user.id)
+        etag = f'"{version}-{renderer.format}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        renderer.prepare()
+        ingredients = cache.get(shopping_cart_key(request.user.id, version))
+        if ingredients is None:
+            ingredients = cache_shopping_cart(
+                request.user.id,
+                version,
+                IngredientRecipe.objects.using(DEFAULT_DB_ALIAS).filter(
+                    recipe__shopping_carts__user=request.user
+                ).values(
+                    'ingredient__name',
+                    'ingredient__measurement_unit',
+                ).annotate(
+                    amount=Sum('amount')
+                ).order_by(
+                    'ingredient__name',
+                    'ingredient__measurement_unit',
+                ).iterator()
+            )
+            if settings.SERVER_MODE == 'asgi':
+                ingredients = list(ingredients)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        response['ETag'] = etag
         return response
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(
+    SerializerTimingMixin, ReplicaReadMixin, UserViewSet
+):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
@@ -150,22 +298,31 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscribe(self, request, **kwargs):
         author = get_object_or_404(User, id=self.kwargs.get('id'))
-        subscription, created = Subscribe.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
-        if request.method == 'POST' and not created:
+        if request.method == 'DELETE':
+            with transaction.atomic():
+                deleted, _ = Subscribe.objects.filter(
+                    user=request.user,
+                    author=author
+                ).delete()
+                if deleted:
+                    change_counter(User, author.id, 'subscribers_count', -1)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        with transaction.atomic():
+            _, created = Subscribe.objects.get_or_create(
+                user=request.user,
+                author=author
+            )
+            if created:
+                change_counter(User, author.id, 'subscribers_count', 1)
+        if not created:
             raise exceptions.ValidationError(
                 detail='Вы уже подписались на данного автора!'
             )
-        if request.method == 'POST':
-            serializer = SubscribeSerializer(
-                author,
-                context={'request': request}
-            )
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        subscription.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        serializer = SubscribeSerializer(
+            author,
+            context={'request': request}
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(
         detail=False,
@@ -175,7 +332,19 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(permissions.IsAuthenticated,),
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscriber__user=self.request.user)
+        recipes = Recipe.objects.all()
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:int(recipes_limit)]
+            ))
+        queryset = User.objects.filter(
+            subscriber__user=self.request.user
+        ).order_by('username').prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        )
         serializer = SubscribeSerializer(
             self.paginate_queryset(queryset),
             context={'request': request},
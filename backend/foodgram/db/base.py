@@ -0,0 +1,26 @@
+from django.db.backends.postgresql import base
+
+from .creation import DatabaseCreation
+from .pool import connection_pools
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = connection_pools.get(
+            self.alias, self.settings_dict, conn_params
+        )
+        connection = self.pool.get()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.put(self.connection)
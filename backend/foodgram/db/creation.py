@@ -0,0 +1,10 @@
+from django.db.backends.postgresql import creation
+
+from .pool import connection_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        connection_pools.close_all()
+        super()._destroy_test_db(test_database_name, verbosity)
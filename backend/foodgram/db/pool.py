@@ -0,0 +1,195 @@
+import atexit
+from collections import deque
+from threading import Condition, Lock
+from time import monotonic
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'CHECK_INTERVAL': 30,
+}
+
+
+def connect(conn_params):
+    connection = psycopg2.connect(**conn_params)
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda x: x
+    )
+    return connection
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+class ConnectionPool:
+
+    def __init__(self, conn_params, max_size, timeout, check_interval):
+        self.conn_params = conn_params
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.condition = Condition()
+        self.idle = deque()
+        self.size = 0
+        self.closed = False
+        self.stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'discarded': 0,
+        }
+
+    def get(self):
+        deadline = monotonic() + self.timeout
+        while True:
+            connection = self.checkout(deadline)
+            if connection is None:
+                break
+            connection, returned = connection
+            if (
+                not connection.closed
+                and (
+                    monotonic() - returned < self.check_interval
+                    or is_alive(connection)
+                )
+            ):
+                return connection
+            self.discard(connection)
+        try:
+            return connect(self.conn_params)
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+    def checkout(self, deadline):
+        with self.condition:
+            started = monotonic()
+            waited = False
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise psycopg2.OperationalError(
+                        'Нет свободных соединений в пуле за '
+                        f'{self.timeout} с (максимум {self.max_size})'
+                    )
+                waited = True
+                self.condition.wait(remaining)
+            if waited:
+                self.stats['waits'] += 1
+                self.stats['wait_seconds'] += monotonic() - started
+            self.stats['checkouts'] += 1
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def put(self, connection):
+        status = connection.info.transaction_status
+        if status in (
+            psycopg2.extensions.TRANSACTION_STATUS_INTRANS,
+            psycopg2.extensions.TRANSACTION_STATUS_INERROR,
+        ):
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                status = psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        if (
+            connection.closed
+            or status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        ):
+            self.discard(connection)
+            return
+        with self.condition:
+            if not self.closed:
+                self.idle.append((connection, monotonic()))
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            idle = [connection for connection, _ in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            self.discard(connection)
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.stats['discarded'] += 1
+            self.condition.notify()
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                **self.stats,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'max_size': self.max_size,
+            }
+
+
+class PoolRegistry:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.pools = {}
+
+    def get(self, alias, settings_dict, conn_params):
+        key = (alias, repr(sorted(conn_params.items())))
+        stale = []
+        with self.lock:
+            if key not in self.pools:
+                stale = [
+                    self.pools.pop(other) for other in list(self.pools)
+                    if other[0] == alias
+                ]
+                options = {**POOL_DEFAULTS, **settings_dict.get('POOL', {})}
+                self.pools[key] = ConnectionPool(
+                    conn_params,
+                    max_size=options['MAX_SIZE'],
+                    timeout=options['TIMEOUT'],
+                    check_interval=options['CHECK_INTERVAL'],
+                )
+            pool = self.pools[key]
+        for old_pool in stale:
+            old_pool.close()
+        return pool
+
+    def close_all(self):
+        with self.lock:
+            pools = list(self.pools.values())
+            self.pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def snapshot(self):
+        with self.lock:
+            pools = dict(self.pools)
+        return {alias: pool.snapshot() for (alias, _), pool in pools.items()}
+
+
+connection_pools = PoolRegistry()
+atexit.register(connection_pools.close_all)
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLResolver
+
+logger = logging.getLogger('foodgram.performance')
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.lock = Lock()
+        self.views = defaultdict(lambda: defaultdict(float))
+
+    def record(self, view, timings, queries):
+        with self.lock:
+            stats = self.views[view]
+            stats['requests'] += 1
+            stats['queries'] += queries
+            for name, duration in timings.items():
+                stats[name] += duration
+
+    def snapshot(self):
+        with self.lock:
+            return {view: dict(stats) for view, stats in self.views.items()}
+
+
+request_metrics = RequestMetrics()
+
+
+class QueryTimer:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+
+
+@contextmanager
+def instrument_queries(timer):
+    with ExitStack() as stack:
+        if timer is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+        yield
+
+
+def instrumented_view(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with instrument_queries(getattr(request, 'query_timer', None)):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def instrument_sync_views(urlpatterns):
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            instrument_sync_views(pattern.url_patterns)
+        elif not asyncio.iscoroutinefunction(pattern.callback):
+            pattern.callback = instrumented_view(pattern.callback)
+    return urlpatterns
+
+
+def timing_mark(request):
+    timer = getattr(request, 'query_timer', None)
+    return perf_counter(), timer.duration if timer is not None else 0.0
+
+
+def get_view_name(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.query_timer = QueryTimer()
+        started = perf_counter()
+        with instrument_queries(request.query_timer):
+            response = self.get_response(request)
+        return self.record(request, response, started)
+
+    async def __acall__(self, request):
+        request.query_timer = QueryTimer()
+        started = perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, started)
+
+    def record(self, request, response, started):
+        if getattr(request, 'view_name', None) is None:
+            return response
+        if response.streaming:
+            if not hasattr(request, 'view_finished'):
+                request.view_finished = timing_mark(request)
+            response.streaming_content = self.stream(
+                request, response.streaming_content, started
+            )
+            return response
+        timings = self.save_metrics(request, started)
+        response['Server-Timing'] = ', '.join(
+            [
+                f'{name};dur={duration * 1000:.1f}'
+                for name, duration in timings.items()
+            ] + [f'queries;desc="{request.query_timer.count}"']
+        )
+        return response
+
+    def stream(self, request, content, started):
+        try:
+            with instrument_queries(request.query_timer):
+                yield from content
+        finally:
+            self.save_metrics(request, started)
+
+    def save_metrics(self, request, started):
+        timer = request.query_timer
+        finished = perf_counter()
+        view_started, view_db_started = request.view_started
+        view_finished, view_db_finished = getattr(
+            request, 'view_finished', (finished, timer.duration)
+        )
+        serialize = 0.0
+        if hasattr(request, 'serializer_started'):
+            serializer_started, serializer_db_started = (
+                request.serializer_started
+            )
+            serializer_finished, serializer_db_finished = getattr(
+                request,
+                'serializer_finished',
+                (view_finished, view_db_finished),
+            )
+            serialize = (
+                serializer_finished - serializer_started
+                - (serializer_db_finished - serializer_db_started)
+            )
+        timings = {
+            'db': timer.duration,
+            'app': (
+                view_finished - view_started
+                - (view_db_finished - view_db_started)
+                - serialize
+            ),
+            'serialize': serialize,
+            'render': finished - view_finished,
+            'total': finished - started,
+        }
+        request_metrics.record(request.view_name, timings, timer.count)
+        if timings['total'] * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.0f мс, SQL: %d за %.0f мс',
+                request.method,
+                request.get_full_path(),
+                request.view_name,
+                timings['total'] * 1000,
+                timer.count,
+                timer.duration * 1000,
+            )
+        return timings
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = get_view_name(view_func, request.method)
+        request.view_started = timing_mark(request)
+
+    def process_template_response(self, request, response):
+        request.view_finished = timing_mark(request)
+        return response
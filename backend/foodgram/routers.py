@@ -0,0 +1,51 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def primary_reads():
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def primary_pin_key(user_id):
+    return f'primary_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            primary_pin_key(user_id),
+            True,
+            timeout=settings.REPLICA_PIN_SECONDS,
+        )
+
+
+def is_pinned_to_primary(user_id):
+    return bool(cache.get(primary_pin_key(user_id)))
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and replica_reads.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,189 @@
+from time import sleep
+from unittest import skipUnless
+
+import psycopg2
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from users.models import User
+from .db.base import DatabaseWrapper
+from .db.pool import ConnectionPool, PoolRegistry
+
+REPLICA = 'replica_1'
+
+if REPLICA not in connections.settings:
+    connections.settings[REPLICA] = {
+        **connections.settings['default'],
+        'TEST': {
+            **connections.settings['default']['TEST'],
+            'MIRROR': 'default',
+        },
+    }
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+class ConnectionPoolTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.conn_params = connection.get_connection_params()
+
+    def create_pool(self, **kwargs):
+        options = {'max_size': 2, 'timeout': 0.1, 'check_interval': 30}
+        pool = ConnectionPool(self.conn_params, **{**options, **kwargs})
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_connection_is_reused(self):
+        pool = self.create_pool()
+        first = pool.get()
+        pool.put(first)
+        self.assertIs(pool.get(), first)
+        self.assertEqual(pool.snapshot()['size'], 1)
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        pool = self.create_pool()
+        first = pool.get()
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        pool.put(first)
+        self.assertEqual(
+            first.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE,
+        )
+
+    def test_timeout_when_exhausted(self):
+        pool = self.create_pool(max_size=1)
+        pool.get()
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.get()
+        self.assertEqual(pool.snapshot()['timeouts'], 1)
+
+    def test_close_drains_idle_and_returned_connections(self):
+        pool = self.create_pool()
+        idle = pool.get()
+        in_use = pool.get()
+        pool.put(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.put(in_use)
+        self.assertTrue(in_use.closed)
+        self.assertEqual(pool.snapshot()['size'], 0)
+
+    def test_registry_replaces_pool_when_parameters_change(self):
+        registry = PoolRegistry()
+        self.addCleanup(registry.close_all)
+        old_pool = registry.get('default', {}, self.conn_params)
+        old_connection = old_pool.get()
+        old_pool.put(old_connection)
+        new_pool = registry.get(
+            'default', {}, {**self.conn_params, 'database': 'postgres'}
+        )
+        self.assertIsNot(new_pool, old_pool)
+        self.assertTrue(old_connection.closed)
+        self.assertIs(
+            registry.get('default', {}, {**self.conn_params}),
+            registry.get('default', {}, self.conn_params),
+        )
+
+    def test_database_wrapper_returns_connections_to_pool(self):
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'POOL': {'MAX_SIZE': 1}},
+            alias='pool_test',
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(lambda: wrapper.pool.close())
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertFalse(raw.closed)
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw)
+        wrapper.close()
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_PIN_SECONDS=1)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='password',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            name='Рецепт',
+            text='Описание',
+            image='recipes/images/test.png',
+            cooking_time=10,
+        )
+
+    def request(self, client, method, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(client, method)(url)
+        return response, primary.captured_queries, replica.captured_queries
+
+    def test_anonymous_safe_read_uses_replica(self):
+        response, primary, replica = self.request(
+            APIClient(), 'get', f'/api/ingredients/{self.ingredient.id}/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+    def test_anonymous_cache_miss_reads_primary(self):
+        response, primary, replica = self.request(
+            APIClient(), 'get', '/api/recipes/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+    def test_token_lookup_uses_primary(self):
+        response, primary, replica = self.request(
+            self.client, 'get', '/api/recipes/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(
+            'authtoken_token' in query['sql'] for query in primary
+        ))
+        self.assertFalse(any(
+            'authtoken_token' in query['sql'] for query in replica
+        ))
+        self.assertTrue(replica)
+
+    def test_write_uses_primary_and_pins_next_reads(self):
+        response, primary, replica = self.request(
+            self.client, 'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+        response, primary, replica = self.request(
+            self.client, 'get', '/api/recipes/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+        self.assertEqual(replica, [])
+        sleep(1.1)
+        response, primary, replica = self.request(
+            self.client, 'get', '/api/recipes/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica)
@@ -3,11 +3,18 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from .middleware import instrument_sync_views
+from .views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls', namespace='api')),
+    path('metrics/', metrics, name='metrics'),
 ]
 
+if settings.SERVER_MODE == 'asgi':
+    instrument_sync_views(urlpatterns)
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
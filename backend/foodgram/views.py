@@ -0,0 +1,83 @@
+from django.http import HttpResponse
+from rest_framework.decorators import (
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer
+
+from api.permissions import HasMetricsToken
+from .db.pool import connection_pools
+from .middleware import request_metrics
+
+METRICS = (
+    ('requests', 'foodgram_requests_total', 'counter',
+     'Количество обработанных запросов'),
+    ('queries', 'foodgram_db_queries_total', 'counter',
+     'Количество SQL-запросов'),
+    ('total', 'foodgram_request_duration_seconds_total', 'counter',
+     'Суммарное время обработки запросов'),
+    ('db', 'foodgram_db_duration_seconds_total', 'counter',
+     'Суммарное время SQL-запросов'),
+    ('app', 'foodgram_app_duration_seconds_total', 'counter',
+     'Суммарное время кода представлений без сериализации и SQL'),
+    ('serialize', 'foodgram_serialize_duration_seconds_total', 'counter',
+     'Суммарное время сериализации ответов без SQL'),
+    ('render', 'foodgram_render_duration_seconds_total', 'counter',
+     'Суммарное время рендеринга ответов'),
+)
+POOL_METRICS = (
+    ('size', 'foodgram_db_pool_connections', 'gauge',
+     'Открытые соединения пула'),
+    ('in_use', 'foodgram_db_pool_connections_in_use', 'gauge',
+     'Соединения пула, занятые запросами'),
+    ('idle', 'foodgram_db_pool_connections_idle', 'gauge',
+     'Свободные соединения пула'),
+    ('max_size', 'foodgram_db_pool_max_size', 'gauge',
+     'Максимальный размер пула'),
+    ('checkouts', 'foodgram_db_pool_checkouts_total', 'counter',
+     'Количество выдач соединений из пула'),
+    ('waits', 'foodgram_db_pool_waits_total', 'counter',
+     'Количество ожиданий свободного соединения'),
+    ('wait_seconds', 'foodgram_db_pool_wait_seconds_total', 'counter',
+     'Суммарное время ожидания свободного соединения'),
+    ('timeouts', 'foodgram_db_pool_timeouts_total', 'counter',
+     'Количество отказов по таймауту ожидания'),
+    ('discarded', 'foodgram_db_pool_discarded_total', 'counter',
+     'Количество закрытых неисправных соединений'),
+)
+
+
+class MetricsRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+@api_view(['GET'])
+@renderer_classes((MetricsRenderer,))
+@permission_classes((IsAdminUser | HasMetricsToken,))
+def metrics(request):
+    snapshot = request_metrics.snapshot()
+    lines = []
+    for key, name, metric_type, description in METRICS:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for view, stats in sorted(snapshot.items()):
+            lines.append(f'{name}{{view="{view}"}} {stats.get(key, 0):g}')
+    pools = connection_pools.snapshot()
+    for key, name, metric_type, description in POOL_METRICS:
+        if not pools:
+            break
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for alias, stats in sorted(pools.items()):
+            lines.append(f'{name}{{database="{alias}"}} {stats[key]:g}')
+    return HttpResponse(
+        '\n'.join(lines) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
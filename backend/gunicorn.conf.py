@@ -0,0 +1,22 @@
+import os
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if (
+    workers > 1
+    and os.getenv('CACHE_BACKEND', LOCAL_CACHE_BACKEND) == LOCAL_CACHE_BACKEND
+):
+    raise RuntimeError(
+        'Несколько воркеров требуют общего кэша: задайте CACHE_BACKEND и '
+        'CACHE_LOCATION (например, Redis) или GUNICORN_WORKERS=1.'
+    )
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+    threads = int(os.getenv('GUNICORN_THREADS', 1))
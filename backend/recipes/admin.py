@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django.forms.models import BaseInlineFormSet
 
+from .cache import bump_recipe_shopping_carts
 from .models import (
     Ingredient,
     Tag,
@@ -85,8 +86,17 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     inlines = (IngredientRecipeInLine, TagRecipeInLine)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change:
+            bump_recipe_shopping_carts((form.instance.id,))
+
+    @admin.display(
+        description='Добавлений в избранное',
+        ordering='favorites_count',
+    )
     def count_favorite(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 admin.site.register(Favorite)
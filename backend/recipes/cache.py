@@ -0,0 +1,140 @@
+from functools import partial
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ShoppingCart
+
+SHOPPING_CART_TIMEOUT = 60 * 60 * 24
+RECIPE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+RECIPES_LIST_VERSION_KEY = 'recipes_list_version'
+CATALOG_VERSION_KEY = 'catalog_version'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        cache.add(key, version, timeout=None)
+        version = cache.get(key, version)
+    return version
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(cache.get_many(missing.keys()))
+    return versions
+
+
+def shopping_cart_version_key(user_id):
+    return f'shopping_cart_version:{user_id}'
+
+
+def get_shopping_cart_version(user_id):
+    return get_version(shopping_cart_version_key(user_id))
+
+
+def bump_shopping_cart_version(user_ids):
+    cache.delete_many(
+        [shopping_cart_version_key(user_id) for user_id in user_ids]
+    )
+
+
+def bump_recipe_shopping_carts(recipe_ids):
+    user_ids = list(ShoppingCart.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('user_id', flat=True).distinct())
+    if user_ids:
+        transaction.on_commit(partial(bump_shopping_cart_version, user_ids))
+
+
+def shopping_cart_key(user_id, version):
+    return f'shopping_cart:{user_id}:{version}'
+
+
+def cache_shopping_cart(user_id, version, ingredients):
+    rows = []
+    for ingredient in ingredients:
+        rows.append(ingredient)
+        yield ingredient
+    cache.set(
+        shopping_cart_key(user_id, version),
+        rows,
+        timeout=SHOPPING_CART_TIMEOUT
+    )
+
+
+def recipe_version_key(recipe_id):
+    return f'recipe_version:{recipe_id}'
+
+
+def bump_recipes_list_version():
+    cache.delete(RECIPES_LIST_VERSION_KEY)
+
+
+def bump_recipe_versions(recipe_ids):
+    cache.delete_many(
+        [recipe_version_key(recipe_id) for recipe_id in recipe_ids]
+        + [RECIPES_LIST_VERSION_KEY]
+    )
+
+
+def bump_catalog_version():
+    cache.delete(CATALOG_VERSION_KEY)
+
+
+def anonymous_recipes_key(query_hash, recipe_id=None):
+    catalog_version = get_version(CATALOG_VERSION_KEY)
+    if recipe_id is None:
+        return (
+            f'anonymous_recipes:{catalog_version}:'
+            f'{get_version(RECIPES_LIST_VERSION_KEY)}:{query_hash}'
+        )
+    return (
+        f'anonymous_recipe:{recipe_id}:{catalog_version}:'
+        f'{get_version(recipe_version_key(recipe_id))}:{query_hash}'
+    )
+
+
+def get_anonymous_response(key):
+    return cache.get(key)
+
+
+def set_anonymous_response(key, data):
+    cache.set(key, data, timeout=settings.ANONYMOUS_CACHE_TIMEOUT)
+
+
+def recipe_fragment_keys(recipe_ids):
+    catalog_version = get_version(CATALOG_VERSION_KEY)
+    version_keys = {
+        recipe_id: recipe_version_key(recipe_id) for recipe_id in recipe_ids
+    }
+    versions = get_versions(version_keys.values())
+    return {
+        recipe_id: (
+            f'recipe_fragment:{recipe_id}:{catalog_version}:'
+            f'{versions[version_key]}'
+        )
+        for recipe_id, version_key in version_keys.items()
+    }
+
+
+def get_recipe_fragments(keys):
+    fragments = cache.get_many(keys.values())
+    return {
+        recipe_id: fragments[key]
+        for recipe_id, key in keys.items()
+        if key in fragments
+    }
+
+
+def set_recipe_fragments(keys, fragments):
+    cache.set_many(
+        {keys[recipe_id]: data for recipe_id, data in fragments.items()},
+        timeout=RECIPE_FRAGMENT_TIMEOUT
+    )
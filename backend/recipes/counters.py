@@ -0,0 +1,42 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def reconcile(model, counter, source, field):
+    actual = count_subquery(source, field)
+    return model.objects.exclude(**{counter: actual}).update(
+        **{counter: actual}
+    )
+
+
+def reconcile_counters(user, subscribe, recipe, favorite, shopping_cart):
+    return {
+        'Recipe.favorites_count': reconcile(
+            recipe, 'favorites_count', favorite, 'recipe'
+        ),
+        'Recipe.in_carts_count': reconcile(
+            recipe, 'in_carts_count', shopping_cart, 'recipe'
+        ),
+        'User.recipes_count': reconcile(
+            user, 'recipes_count', recipe, 'author'
+        ),
+        'User.subscribers_count': reconcile(
+            user, 'subscribers_count', subscribe, 'author'
+        ),
+    }
+
+
+def change_counter(model, pk, counter, delta):
+    model.objects.filter(pk=pk).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
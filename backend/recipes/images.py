@@ -0,0 +1,92 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image
+
+from .cache import bump_recipe_versions
+from .models import Recipe
+
+RENDITIONS_DIR = 'recipes/renditions/'
+RENDITION_FORMAT = 'WEBP'
+
+logger = logging.getLogger('foodgram.images')
+
+
+def get_image_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def rendition_name(image_name, rendition):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{RENDITIONS_DIR}{stem}_{rendition}.webp'
+
+
+def render(image, size):
+    rendition = image.copy()
+    rendition.thumbnail((size, size))
+    buffer = BytesIO()
+    rendition.save(
+        buffer, RENDITION_FORMAT, quality=settings.IMAGE_RENDITION_QUALITY
+    )
+    return buffer.getvalue()
+
+
+def build_renditions(recipe_id, image_name):
+    storage = get_image_storage()
+    renditions = {}
+    with storage.open(image_name) as file, Image.open(file) as image:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        for rendition, size in settings.IMAGE_RENDITIONS.items():
+            renditions[rendition] = storage.save(
+                rendition_name(image_name, rendition),
+                ContentFile(render(image, size)),
+            )
+    if Recipe.objects.filter(id=recipe_id, image=image_name).update(
+        image_renditions=renditions
+    ):
+        bump_recipe_versions((recipe_id,))
+    return renditions
+
+
+def process_renditions(recipe_id, image_name):
+    try:
+        build_renditions(recipe_id, image_name)
+    except Exception:
+        logger.exception(
+            'Не удалось подготовить миниатюры рецепта %s (%s)',
+            recipe_id,
+            image_name,
+        )
+        return False
+    return True
+
+
+class RenditionPool:
+    def __init__(self):
+        self.lock = Lock()
+        self.executor = None
+
+    def submit(self, recipe_id, image_name):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_RENDITION_WORKERS,
+                    thread_name_prefix='renditions',
+                )
+        return self.executor.submit(self.run, recipe_id, image_name)
+
+    def run(self, recipe_id, image_name):
+        try:
+            process_renditions(recipe_id, image_name)
+        finally:
+            connections.close_all()
+
+
+rendition_pool = RenditionPool()
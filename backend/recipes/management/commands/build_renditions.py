@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand
+
+from recipes.images import process_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры изображений рецептов, у которых их еще нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='пересоздать миниатюры всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+        total = 0
+        failed = 0
+        for recipe_id, image_name in recipes.values_list(
+            'id', 'image'
+        ).iterator():
+            if not process_renditions(recipe_id, image_name):
+                failed += 1
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {total - failed}'
+        ))
+        if failed:
+            self.stderr.write(self.style.ERROR(
+                f'Не удалось обработать рецептов: {failed}'
+            ))
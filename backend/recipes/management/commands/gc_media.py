@@ -0,0 +1,78 @@
+import os
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from recipes.images import RENDITIONS_DIR, get_image_storage
+from recipes.models import Recipe
+
+IMAGES_DIR = Recipe._meta.get_field('image').upload_to
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for filename in files:
+        yield os.path.join(path, filename)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет изображения рецептов и миниатюры, на которые не ссылается '
+        'ни один рецепт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=24,
+            help='не трогать файлы моложе указанного числа часов',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='только показать, что будет удалено',
+        )
+
+    def get_referenced(self):
+        referenced = set()
+        for image, renditions in Recipe.objects.values_list(
+            'image', 'image_renditions'
+        ).iterator():
+            referenced.add(image)
+            referenced.update(renditions.values())
+        return referenced
+
+    def handle(self, *args, **options):
+        storage = get_image_storage()
+        referenced = self.get_referenced()
+        threshold = timezone.now() - timedelta(hours=options['min_age'])
+        orphans = []
+        for directory in (IMAGES_DIR, RENDITIONS_DIR):
+            if not storage.exists(directory):
+                continue
+            orphans.extend(
+                name for name in walk(storage, directory.rstrip('/'))
+                if name not in referenced
+                and storage.get_modified_time(name) < threshold
+            )
+        if orphans:
+            referenced = self.get_referenced()
+        removed = 0
+        for name in orphans:
+            if name in referenced:
+                continue
+            if options['dry_run']:
+                self.stdout.write(name)
+            elif storage.get_modified_time(name) < threshold:
+                storage.delete(name)
+            else:
+                continue
+            removed += 1
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} неиспользуемых файлов: {removed}'
+        ))
@@ -1,18 +1,80 @@
 import csv
+import json
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
+from recipes.cache import bump_catalog_version
+from recipes.search import ingredient_index
+
+FORMATS = ('csv', 'json')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        name, measurement_unit = row
+        yield name, measurement_unit
+
+
+def read_json(file):
+    for row in json.load(file):
+        yield row['name'], row['measurement_unit']
 
 
 class Command(BaseCommand):
+    help = 'Импортирует ингредиенты из CSV или JSON файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='data/ingredients.csv',
+            help='путь к файлу с ингредиентами',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='формат файла, по умолчанию определяется по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='количество строк в одном INSERT',
+        )
 
-    def handle(self, *args, **kwargs):
-        with open('data/ingredients.csv', encoding='UTF-8') as file:
-            for row in csv.reader(file):
-                name, measurement_unit = row
-                Ingredient.objects.create(
-                    name=name,
-                    measurement_unit=measurement_unit
-                )
-            print('Импорт данных завершен!')
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+        reader = read_csv if file_format == 'csv' else read_json
+        started = perf_counter()
+        total = 0
+        with open(path, encoding='UTF-8') as file, transaction.atomic():
+            count_before = Ingredient.objects.count()
+            rows = reader(file)
+            while True:
+                batch = [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in islice(
+                        rows, options['batch_size']
+                    )
+                ]
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+            created = Ingredient.objects.count() - count_before
+        ingredient_index.invalidate()
+        bump_catalog_version()
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт данных завершен! Прочитано строк: {total}, '
+            f'добавлено: {created}, за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с).'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики и исправляет расхождения.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_counters(
+                User, Subscribe, Recipe, Favorite, ShoppingCart
+            )
+        for counter, rows in fixed.items():
+            self.stdout.write(f'{counter}: исправлено строк {rows}')
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны!'))
@@ -0,0 +1,255 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TagRecipe,
+)
+from recipes.cache import bump_catalog_version
+from recipes.counters import reconcile_counters
+from recipes.images import get_image_storage
+from recipes.search import ingredient_index
+from users.models import Subscribe, User
+
+BATCH_SIZE = 2000
+SEED_IMAGE = 'recipes/images/seed.png'
+SEED_IMAGE_SIZE = (640, 480)
+SEED_IMAGE_COLOR = (230, 160, 90)
+PUB_DATE_SPREAD_DAYS = 365
+
+
+def skewed_weights(count):
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def sample_skewed(population, weights, count):
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(random.choices(
+            population, weights=weights, k=count - len(chosen)
+        ))
+    return chosen
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими данными для нагрузочных тестов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=2000,
+            help='минимальное количество ингредиентов в базе',
+        )
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='префикс имен создаваемых пользователей',
+        )
+        parser.add_argument('--random-seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        random.seed(options['random_seed'])
+        started = perf_counter()
+        image = self.create_image()
+        with transaction.atomic():
+            tag_ids = self.create_tags(options['tags'])
+            ingredient_ids = self.create_ingredients(options['ingredients'])
+            user_ids = self.create_users(options['users'], options['prefix'])
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, tag_ids, ingredient_ids, image
+            )
+            self.create_user_links(
+                Favorite, user_ids, recipe_ids,
+                options['favorites_per_user']
+            )
+            self.create_user_links(
+                ShoppingCart, user_ids, recipe_ids,
+                options['carts_per_user']
+            )
+            self.create_subscriptions(
+                user_ids, options['subscriptions_per_user']
+            )
+            reconcile_counters(
+                User, Subscribe, Recipe, Favorite, ShoppingCart
+            )
+        ingredient_index.invalidate()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {perf_counter() - started:.1f} с.'
+        ))
+
+    def create_image(self):
+        buffer = BytesIO()
+        Image.new('RGB', SEED_IMAGE_SIZE, SEED_IMAGE_COLOR).save(
+            buffer, format='PNG'
+        )
+        return get_image_storage().save(
+            SEED_IMAGE, ContentFile(buffer.getvalue())
+        )
+
+    def create_tags(self, count):
+        existing = Tag.objects.count()
+        Tag.objects.bulk_create(
+            [
+                Tag(
+                    name=f'Тег {number}',
+                    color=f'#{number:06X}',
+                    slug=f'tag-{number}',
+                )
+                for number in range(existing, count)
+            ],
+            ignore_conflicts=True,
+        )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_ingredients(self, count):
+        existing = Ingredient.objects.count()
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(
+                    name=f'ингредиент {number}',
+                    measurement_unit=random.choice(('г', 'мл', 'шт')),
+                )
+                for number in range(existing, count)
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_users(self, count, prefix):
+        password = make_password('password')
+        start = User.objects.filter(username__startswith=f'{prefix}_').count()
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'{prefix}_{number}',
+                    email=f'{prefix}_{number}@example.com',
+                    first_name='Имя',
+                    last_name='Фамилия',
+                    password=password,
+                )
+                for number in range(start, start + count)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f'Пользователей: {count}')
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).values_list('id', flat=True))
+
+    def create_recipes(
+        self, count, user_ids, tag_ids, ingredient_ids, image
+    ):
+        now = timezone.now()
+        author_weights = skewed_weights(len(user_ids))
+        start = Recipe.objects.count()
+        recipes = [
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {number}',
+                text=f'Описание синтетического рецепта номер {number}.',
+                image=image,
+                cooking_time=random.randint(5, 180),
+            )
+            for number, author_id in enumerate(
+                random.choices(user_ids, weights=author_weights, k=count),
+                start=start,
+            )
+        ]
+        Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+        recipes = list(Recipe.objects.filter(
+            author_id__in=user_ids, pub_date__gte=now
+        ))
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                days=random.random() * PUB_DATE_SPREAD_DAYS
+            )
+        Recipe.objects.bulk_update(recipes, ('pub_date',), BATCH_SIZE)
+        recipe_ids = [recipe.id for recipe in recipes]
+        TagRecipe.objects.bulk_create(
+            [
+                TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in random.sample(
+                    tag_ids, min(len(tag_ids), random.randint(1, 3))
+                )
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        IngredientRecipe.objects.bulk_create(
+            [
+                IngredientRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=random.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in random.sample(
+                    ingredient_ids,
+                    min(len(ingredient_ids), random.randint(3, 15))
+                )
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f'Рецептов: {len(recipe_ids)}')
+        return recipe_ids
+
+    def create_user_links(self, model, user_ids, recipe_ids, per_user):
+        weights = skewed_weights(len(recipe_ids))
+        model.objects.bulk_create(
+            [
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in sample_skewed(
+                    recipe_ids, weights, random.randint(0, 2 * per_user)
+                )
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: '
+            f'{model.objects.filter(user_id__in=user_ids).count()}'
+        )
+
+    def create_subscriptions(self, user_ids, per_user):
+        weights = skewed_weights(len(user_ids))
+        Subscribe.objects.bulk_create(
+            [
+                Subscribe(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in sample_skewed(
+                    user_ids, weights, random.randint(0, 2 * per_user)
+                )
+                if author_id != user_id
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        self.stdout.write(
+            'Подписок: '
+            f'{Subscribe.objects.filter(user_id__in=user_ids).count()}'
+        )
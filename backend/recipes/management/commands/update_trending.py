@@ -0,0 +1,20 @@
+from time import perf_counter
+
+from django.core.management import BaseCommand
+
+from recipes.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярности рецептов по недавним '
+        'добавлениям в избранное. Запускать периодически (cron).'
+    )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        updated, reset = update_trending_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлен у {updated} рецептов, сброшен у {reset} '
+            f'за {perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.3 on 2026-10-18 06:03
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_amounts(IngredientRecipe, ingredient_id):
+    duplicates = IngredientRecipe.objects.filter(
+        ingredient_id=ingredient_id
+    ).values('recipe_id').annotate(
+        keep_id=Min('id'), amount=Sum('amount'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        IngredientRecipe.objects.filter(
+            id=duplicate['keep_id']
+        ).update(amount=duplicate['amount'])
+        IngredientRecipe.objects.filter(
+            ingredient_id=ingredient_id,
+            recipe_id=duplicate['recipe_id'],
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        extra_ids = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+        IngredientRecipe.objects.filter(
+            ingredient_id__in=list(extra_ids)
+        ).update(ingredient_id=duplicate['keep_id'])
+        merge_duplicate_amounts(IngredientRecipe, duplicate['keep_id'])
+        Ingredient.objects.filter(id__in=list(extra_ids)).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
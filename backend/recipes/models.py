@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -5,6 +6,8 @@ from colorfield.fields import ColorField
 
 from users.models import User
 
+from .storage import content_storage
+
 MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 10080
 MIN_ING_AMOUNT = 1
@@ -26,6 +29,12 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('pk',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            ),
+        ]
 
     def __str__(self):
         return self.name[:NAME_LIMIT]
@@ -77,6 +86,12 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='recipes/images/',
+        storage=content_storage,
+    )
+    image_renditions = models.JSONField(
+        'Миниатюры',
+        default=dict,
+        editable=False,
     )
     text = models.TextField(
         'Описание',
@@ -109,11 +124,45 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок',
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        'Рейтинг популярности',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-pub_date', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-pub_date', '-id'],
+                name='recipe_trending_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['name', 'text'],
@@ -151,6 +200,15 @@ class IngredientRecipe(models.Model):
         ],
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['recipe'],
+                include=['ingredient', 'amount'],
+                name='ingredientrecipe_recipe_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.ingredient} {self.recipe}'
 
@@ -188,6 +246,11 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Изб. рецепт',
     )
+    added = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -0,0 +1,88 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.functions import Lower
+
+from .cache import get_version
+from .models import Ingredient
+
+INGREDIENT_INDEX_VERSION_KEY = 'ingredient_index_version'
+INGREDIENT_SEARCH_LIMIT = 20
+
+
+class Casefold(Lower):
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function='CASEFOLD', **extra_context
+        )
+
+
+def casefold(value):
+    return value if value is None else value.casefold()
+
+
+def normalize(name):
+    return name.casefold().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.data = ([], [])
+
+    def invalidate(self):
+        cache.delete(INGREDIENT_INDEX_VERSION_KEY)
+        self.version = None
+
+    def build(self, version):
+        rows = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.using(
+                DEFAULT_DB_ALIAS
+            ).values_list(
+                'id', 'name', 'measurement_unit'
+            ).iterator()
+        )
+        self.data = (
+            [row[0] for row in rows],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in rows
+            ],
+        )
+        self.version = version
+
+    def ensure_built(self):
+        version = get_version(INGREDIENT_INDEX_VERSION_KEY)
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.build(version)
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        self.ensure_built()
+        keys, rows = self.data
+        query = normalize(query)
+        results = []
+        index = bisect_left(keys, query)
+        while (
+            index < len(keys)
+            and keys[index].startswith(query)
+            and len(results) < limit
+        ):
+            results.append(index)
+            index += 1
+        if len(results) < limit:
+            prefix_matches = set(results)
+            for index, key in enumerate(keys):
+                if len(results) >= limit:
+                    break
+                if query in key and index not in prefix_matches:
+                    results.append(index)
+        return [rows[index] for index in results]
+
+
+ingredient_index = IngredientIndex()
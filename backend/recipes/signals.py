@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+from .cache import (
+    bump_catalog_version,
+    bump_recipe_versions,
+    bump_recipes_list_version,
+    bump_shopping_cart_version,
+)
+from .models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TagRecipe,
+)
+from .search import casefold, ingredient_index
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    user_ids = (instance.user_id,)
+    transaction.on_commit(lambda: bump_shopping_cart_version(user_ids))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_recipe_versions((instance.id,)))
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorite_changed(sender, **kwargs):
+    transaction.on_commit(bump_recipes_list_version)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver((post_save, post_delete), sender=TagRecipe)
+def recipe_relation_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_recipe_versions((instance.recipe_id,)))
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    recipe_ids = list(Recipe.objects.filter(
+        author=instance
+    ).values_list('id', flat=True))
+    if recipe_ids:
+        transaction.on_commit(lambda: bump_recipe_versions(recipe_ids))
+
+
+@receiver(connection_created)
+def register_sqlite_functions(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'CASEFOLD', 1, casefold, deterministic=True
+        )
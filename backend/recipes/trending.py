@@ -0,0 +1,41 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_recipes_list_version
+from .models import Favorite, Recipe
+
+TRENDING_BATCH_SIZE = 1000
+
+
+def decay(age, half_life):
+    return 0.5 ** (age / half_life)
+
+
+def update_trending_scores(now=None):
+    now = now or timezone.now()
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    scores = defaultdict(float)
+    for recipe_id, added in Favorite.objects.filter(
+        added__gte=since
+    ).values_list('recipe_id', 'added').iterator():
+        scores[recipe_id] += decay(now - added, half_life)
+    stale_ids = set(Recipe.objects.filter(
+        trending_score__gt=0
+    ).values_list('id', flat=True)) - scores.keys()
+    with transaction.atomic():
+        Recipe.objects.filter(id__in=stale_ids).update(trending_score=0)
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, trending_score=score)
+                for recipe_id, score in scores.items()
+            ],
+            ('trending_score',),
+            TRENDING_BATCH_SIZE,
+        )
+    bump_recipes_list_version()
+    return len(scores), len(stale_ids)